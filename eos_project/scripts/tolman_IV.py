@@ -4,45 +4,110 @@ tolman_iv_simple.py
 Versión simplificada para generar datos de Tolman IV
 """
 
+import json
 import numpy as np
 import pandas as pd
 from pathlib import Path
 
+
+# ===== ECUACIONES FUNDAMENTALES (NO MODIFICAR) =====
+# A y R pueden ser escalares o arreglos que se difundan contra r
+
+_INV_8PI = 1.0 / (8.0 * np.pi)
+
+
+def _tolman_iv(r, A, R):
+    """Ecuaciones (6.2) y (6.3) en una sola pasada: devuelve (rho, p)"""
+    r = np.asarray(r, dtype=float)
+    r2 = r*r
+    # Recíprocos una sola vez: por elemento solo queda una división
+    inv_A2 = 1/(A*A)
+    inv_R2 = 1/(R*R)
+    A2_R2 = A*A*inv_R2
+    x = r2*inv_R2
+    inv_denom = 1/(1 + 2*r2*inv_A2)
+    eight_pi_p = (1 - A2_R2 - 3*x) * inv_A2 * inv_denom
+    eight_pi_rho = ((1 + 3*A2_R2 + 3*x) + 2*(1 - x)*inv_denom) * inv_A2 * inv_denom
+    return eight_pi_rho * _INV_8PI, eight_pi_p * _INV_8PI
+
+
+def _boundary_radius(A, R):
+    """Ecuación (6.6) del paper: rb donde p = 0 (0 si A >= R, sin frontera)"""
+    A2_R2 = (A*A) / (R*R)
+    return np.where(A2_R2 < 1, (R / np.sqrt(3)) * np.sqrt(np.clip(1 - A2_R2, 0, None)), 0.0)
+
+# ===== FIN DE ECUACIONES FUNDAMENTALES =====
+
+
+# Mallas unitarias [0, 1] por número de puntos; se escalan con rb
+_UNIT_GRIDS = {}
+
+
+def _unit_grid(n_points):
+    """Malla np.linspace(0, 1, n_points) compartida (solo lectura)"""
+    grid = _UNIT_GRIDS.get(n_points)
+    if grid is None:
+        grid = np.linspace(0.0, 1.0, n_points)
+        grid.flags.writeable = False
+        _UNIT_GRIDS[n_points] = grid
+    return grid
+
+
+def _cs2(p, rho):
+    """cs2 = dp/dρ = (dp/dr)/(dρ/dr) sobre la malla uniforme en r (último eje)"""
+    # np.gradient necesita al menos 2 puntos; con menos no hay derivada
+    if p.shape[-1] < 2:
+        return np.zeros_like(p)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cs2 = np.gradient(p, axis=-1) / np.gradient(rho, axis=-1)
+    # Regiones con dρ = 0 dan 0 en vez de inf/nan
+    return np.nan_to_num(cs2, nan=0.0, posinf=0.0, neginf=0.0)
+
+
+def _invalid_case_message(A, R):
+    """Mensaje para un caso sin solución (A = 0, R <= A o sin frontera)"""
+    if A == 0:
+        return f"A debe ser distinto de 0. Dados: R={R}, A={A}"
+    if R <= A:
+        return f"R debe ser > A. Dados: R={R}, A={A}"
+    return f"Sin frontera (rb = 0). Dados: R={R}, A={A}"
+
+
 class TolmanIV:
     def __init__(self, A, R):
         self.A = A
         self.R = R
-        if R <= A:
-            raise ValueError(f"R debe ser > A. Dados: R={R}, A={A}")
+        if A == 0 or R <= A:
+            raise ValueError(_invalid_case_message(A, R))
+        
+        # Constantes del caso, calculadas una sola vez
+        self._inv_A2 = 1.0/(A*A)
+        self._inv_R2 = 1.0/(R*R)
+        self._rb = float(_boundary_radius(A, R))
+        rho_c, p_c = _tolman_iv(0.0, A, R)
+        self._rho_c, self._p_c = float(rho_c), float(p_c)
     
     # ===== ECUACIONES FUNDAMENTALES (NO MODIFICAR) =====
     
     def pressure(self, r):
         """Ecuación (6.3) del paper"""
-        r2 = r**2
-        A2 = self.A**2
-        R2 = self.R**2
-        eight_pi_p = (1/A2) * (1 - A2/R2 - 3*r2/R2)/(1 + 2*r2/A2)
-        return eight_pi_p / (8 * np.pi)
+        return _tolman_iv(r, self.A, self.R)[1]
     
     def density(self, r):
         """Ecuación (6.2) del paper"""
-        r2 = r**2
-        A2 = self.A**2
-        R2 = self.R**2
-        term1 = (1/A2) * (1 + 3*A2/R2 + 3*r2/R2)/(1 + 2*r2/A2)
-        term2 = (2/A2) * (1 - r2/R2) / (1 + 2*r2/A2)**2
-        eight_pi_rho = term1 + term2
-        return eight_pi_rho / (8 * np.pi)
+        return _tolman_iv(r, self.A, self.R)[0]
+    
+    def _rho_p(self, r):
+        """Densidad y presión juntas, compartiendo subexpresiones"""
+        return _tolman_iv(r, self.A, self.R)
     
     def boundary_radius(self):
-        """Ecuación (6.6) del paper"""
-        A2 = self.A**2
-        R2 = self.R**2
-        if A2/R2 >= 1:
-            return 0
-        rb = (self.R / np.sqrt(3)) * np.sqrt(1 - A2/R2)
-        return rb
+        """Ecuación (6.6) del paper (calculada en __init__)"""
+        return self._rb
+    
+    def central_values(self):
+        """Densidad y presión en r = 0: (rho_c, p_c)"""
+        return self._rho_c, self._p_c
     
     def total_mass(self):
         """Masa total de la estrella - ecuación del paper"""
@@ -50,56 +115,181 @@ class TolmanIV:
         if rb <= 0:
           return 0
         
-        rb2 = rb**2
-        A2 = self.A**2
-        R2 = self.R**2
+        rb2 = rb*rb
+        inv_A2 = self._inv_A2
+        inv_R2 = self._inv_R2
     
-        numerator = (1 - rb2/R2) * (1 + rb2/A2)
-        denominator = 1 + 2*rb2/A2
+        numerator = (1 - rb2*inv_R2) * (1 + rb2*inv_A2)
+        denominator = 1 + 2*rb2*inv_A2
     
         m = (rb/2) * (1 - numerator/denominator)
         return m
 
     # ===== FIN DE ECUACIONES FUNDAMENTALES =====
     
-    def generate_data(self, n_points=100):
-        """Genera datos de la solución"""
+    def _eos_arrays(self, n_points=100):
+        """Columnas de la solución como arreglos de NumPy (None sin frontera)"""
         rb = self.boundary_radius()
         if rb <= 0:
             return None
            
-        r_values = np.linspace(0, rb * 0.999, n_points)
-        
-        data = []
-        for r in r_values:
-            p = self.pressure(r)
-            rho = self.density(r)
-            
-            if p >= 0 and rho > 0:
-                data.append({
-                    'r': r,
-                    'rho': rho,
-                    'p': p,
-                    'p_over_rho': p/rho  
-                })
-        
+        r = _unit_grid(n_points) * (rb * 0.999)
+
+        # Con R > A y r < rb, 8πp ∝ 1 - A²/R² - 3r²/R² > 0 y r²/R² < 1/3,
+        # así que ρ > 0 y p > 0 en toda la malla: no hace falta máscara
+        rho, p = self._rho_p(r)
+
+        return {
+            'r': r,
+            'rho': rho,
+            'p': p,
+            'p_over_rho': p/rho,
+            'cs2': _cs2(p, rho)
+        }
+    
+    def generate_data(self, n_points=100):
+        """Genera datos de la solución"""
+        data = self._eos_arrays(n_points)
+        if data is None:
+            return None
         return pd.DataFrame(data)
     
-    def save_data(self, df, output_dir='../data/tolman'):
-        """Guarda los datos en CSV"""
+    def save_data(self, df, output_dir='../data/tolman', fmt='csv'):
+        """Guarda los datos en CSV (o en Parquet con fmt='parquet')"""
         if df is None or df.empty:
             return None
+        if fmt not in ('csv', 'parquet'):
+            raise ValueError(f"Formato no soportado: {fmt}")
             
         output_path = Path(output_dir)
         output_path.mkdir(parents=True, exist_ok=True)
         
-        filename = f'tolmanIV_A{self.A}_R{self.R}.csv'
+        filename = f'tolmanIV_A{self.A}_R{self.R}.{fmt}'
         full_path = output_path / filename
-        df.to_csv(full_path, index=False)
+        if fmt == 'parquet':
+            df.to_parquet(full_path, compression='zstd', index=False)
+        else:
+            # Un solo búfer grande para todo el archivo
+            with open(full_path, 'w', buffering=1 << 20, newline='') as f:
+                df.to_csv(f, index=False)
         
         return full_path
 
 
+def save_all_data(df, output_dir='../data/tolman/conjunto'):
+    """Guarda todos los casos en un solo Parquet con columnas A y R"""
+    if df is None or df.empty:
+        return None
+
+    # En su propia carpeta: los lectores por caso no lo ven al buscar archivos
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    full_path = output_path / 'tolmanIV_all.parquet'
+    df.to_parquet(full_path, compression='zstd', index=False)
+
+    return full_path
+
+
+def _evaluate_arrays(A, R, n_points):
+    """Arreglos por caso para A y R de forma (n_casos, 1); el último eje es r"""
+    # Los casos no válidos pueden dividir por cero; se descartan con 'valid'
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Validez por caso como máscara, sin excepciones: lo mismo que exigen
+        # TolmanIV (A != 0, R > A) y _eos_arrays (rb > 0)
+        rb = _boundary_radius(A, R)
+        valid = (A != 0) & (R > A) & (rb > 0)
+        rb = np.where(valid, rb, 0.0)
+
+        # Cada caso con su propio intervalo [0, 0.999*rb]
+        r = _unit_grid(n_points) * (rb * 0.999)
+        rho, p = _tolman_iv(r, A, R)
+    return {
+        'valid': valid[..., 0],
+        'rb': rb[..., 0],
+        'r': r,
+        'rho': rho,
+        'p': p,
+        'cs2': _cs2(p, rho)
+    }
+
+
+def evaluate_cases(cases, n_points=100):
+    """Evalúa pares (A, R) en una sola pasada: (arreglos por caso, DataFrame largo)"""
+    A, R = np.asarray(cases, dtype=float).reshape(-1, 2).T
+    data = _evaluate_arrays(A[:, None], R[:, None], n_points)
+
+    # 'valid' exige A != 0, R > A y rb > 0; con eso y r < rb, ρ > 0 y p > 0
+    # en toda la malla, así que basta con descartar los casos no válidos
+    valid = data['valid']
+    r, rho, p = data['r'][valid], data['rho'][valid], data['p'][valid]
+    df = pd.DataFrame({
+        'A': np.repeat(A[valid], n_points),
+        'R': np.repeat(R[valid], n_points),
+        'r': r.ravel(),
+        'rho': rho.ravel(),
+        'p': p.ravel(),
+        'p_over_rho': (p/rho).ravel(),
+        'cs2': data['cs2'][valid].ravel()
+    })
+    return data, df
+
+
+def parameter_sweep(As, Rs, n_points=100):
+    """Barre la malla (A, R) completa en una sola pasada vectorizada"""
+    A, R = np.meshgrid(np.asarray(As, dtype=float), np.asarray(Rs, dtype=float),
+                       indexing='ij')
+    return evaluate_cases(np.column_stack([A.ravel(), R.ravel()]), n_points)[1]
+
+
+def process_single_case(A, R, n_points=100, fmt='csv', df=None):
+    """Guarda un caso y devuelve su resumen (df: datos ya calculados, opcional)"""
+    summary = {'A': A, 'R': R}
+    
+    try:
+        # Crear solución
+        tolman = TolmanIV(A, R)
+        
+        # Generar datos si no vienen de la evaluación conjunta
+        if df is None:
+            df = tolman.generate_data(n_points)
+        
+        if df is not None and not df.empty:
+            # Guardar
+            path = tolman.save_data(df, fmt=fmt)
+            
+            # Info básica
+            rhoc, pc = tolman.central_values()
+            summary.update({
+                'path': str(path),
+                'n_points': len(df),
+                'rho_c': rhoc,
+                'p_c': pc,
+                'rb': tolman.boundary_radius(),
+                'mass': tolman.total_mass(),
+            })
+            return summary
+        
+        summary['error'] = "No se pudieron generar datos"
+    
+    except Exception as e:
+        summary['error'] = f"Error: {e}"
+    
+    return summary
+
+
+def format_summary(summary):
+    """Texto del resumen de un caso"""
+    lines = [f"\nProcesando A={summary['A']}, R={summary['R']}..."]
+    if 'error' in summary:
+        lines.append(f"  ✗ {summary['error']}")
+    else:
+        lines.append(f"  ✓ Guardado: {summary['path']}")
+        lines.append(f"  Puntos: {summary['n_points']}")
+        lines.append(f"  pc(0) = {summary['p_c']:.4e}, ρc(0) = {summary['rho_c']:.4e}")
+        lines.append(f"  rb = {summary['rb']:.4f}, m = {summary['mass']:.4f}")
+    return "\n".join(lines)
+
 
 def main():
     """Función principal"""
@@ -118,34 +308,41 @@ def main():
     print("GENERANDO DATOS TOLMAN IV")
     print("="*50)
     
-    for A, R in cases:
-        print(f"\nProcesando A={A}, R={R}...")
-        
-        try:
-            # Crear solución
-            tolman = TolmanIV(A, R)
-            
-            # Generar datos
-            df = tolman.generate_data(100)
-            
-            if df is not None and not df.empty:
-                # Guardar
-                path = tolman.save_data(df)
-                print(f"  ✓ Guardado: {path}")
-                print(f"  Puntos: {len(df)}")
-                
-                # Info básica
-                pc = tolman.pressure(0)
-                rhoc = tolman.density(0)
-                rb = tolman.boundary_radius()
-                mass = tolman.total_mass()  # Nueva línea
-                print(f"  pc(0) = {pc:.4e}, ρc(0) = {rhoc:.4e}")
-                print(f"  rb = {rb:.4f}, m = {mass:.4f}")  
+    # Todos los casos en una sola evaluación vectorizada; la misma pasada
+    # marca qué casos tienen solución, sin excepciones
+    batch, all_data = evaluate_cases(cases, n_points=100)
+    valid = batch['valid']
+    
+    output_path = Path('../data/tolman')
+    output_path.mkdir(parents=True, exist_ok=True)
+    
+    # Los datos ya están calculados: solo queda escribir archivos pequeños,
+    # así que se guardan aquí mismo (un pool de procesos solo añadiría
+    # arranque y serialización de los DataFrames)
+    with open(output_path / 'summary.jsonl', 'w', buffering=1 << 20) as f:
+        for i, (A, R) in enumerate(cases):
+            if valid[i]:
+                # La fila i de los arreglos es el caso i, aunque se repita (A, R)
+                rho, p = batch['rho'][i], batch['p'][i]
+                df = pd.DataFrame({
+                    'r': batch['r'][i],
+                    'rho': rho,
+                    'p': p,
+                    'p_over_rho': p/rho,
+                    'cs2': batch['cs2'][i]
+                })
+                # Parquet por caso: más rápido de escribir y de leer que CSV
+                summary = process_single_case(A, R, n_points=100, fmt='parquet', df=df)
             else:
-                print(f"  ✗ No se pudieron generar datos")
-                
-        except Exception as e:
-            print(f"  ✗ Error: {e}")
+                summary = {'A': A, 'R': R, 'error': _invalid_case_message(A, R)}
+            # Una línea JSON compacta por caso
+            f.write(json.dumps(summary, separators=(',', ':')) + '\n')
+            print(format_summary(summary))
+    
+    # Todos los casos juntos, escritos de una sola vez
+    path = save_all_data(all_data, output_dir=output_path / 'conjunto')
+    if path is not None:
+        print(f"\n✓ Guardado conjunto: {path}")
     
     print("\n" + "="*50)
     print("COMPLETADO")
@@ -1,27 +1,88 @@
 #!/usr/bin/env python3
 """
 Script súper simple para Tolman IV
-Solo carga archivos CSV y los grafica - NADA MÁS
+Solo carga archivos Parquet o CSV y los grafica - NADA MÁS
 """
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
+import argparse
 from pathlib import Path
 
+# Si no es None, las figuras se guardan como PNG aquí en vez de mostrarse
+DIRECTORIO_FIGURAS = None
+
+# Más puntos que esto no se distinguen en pantalla
+MAX_PUNTOS_GRAFICA = 1000
+
+# Trazos por bloques en el renderizador Agg (también lo usan TkAgg/QtAgg)
+plt.rcParams['agg.path.chunksize'] = 10000
+
+def _lttb(x, y, n_out=MAX_PUNTOS_GRAFICA):
+    """Reduce una curva a n_out puntos con Largest-Triangle-Three-Buckets"""
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+    
+    # Primer y último punto fijos; el resto se reparte en n_out-2 cubetas
+    bordes = np.linspace(1, n - 1, n_out - 1).astype(int)
+    idx = np.empty(n_out, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bordes[i], bordes[i + 1]
+        # Promedio de la cubeta siguiente (la última usa el punto final)
+        sig_hi = bordes[i + 2] if i + 2 < len(bordes) else n
+        cx, cy = x[hi:sig_hi].mean(), y[hi:sig_hi].mean()
+        # Punto de la cubeta que forma el triángulo más grande
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    
+    return x[idx], y[idx]
+
+def _serie(datos, x, y):
+    """Columnas x, y listas para graficar (reducidas si son muy largas)"""
+    return _lttb(datos[x].to_numpy(), datos[y].to_numpy())
+
+def _mostrar(fig, nombre):
+    """Muestra la figura o la guarda como PNG (modo --no-show)"""
+    if DIRECTORIO_FIGURAS is None:
+        plt.show()
+        return
+    
+    carpeta = Path(DIRECTORIO_FIGURAS)
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / f"{nombre}.png"
+    # La figura ya usa tight_layout; bbox_inches='tight' solo añadiría otro render
+    fig.savefig(ruta, dpi=100, bbox_inches=None)
+    plt.close(fig)
+    print(f"🖼️  Guardada: {ruta}")
+
+def _leer(archivo):
+    """Lee un archivo de datos Parquet o CSV"""
+    if Path(archivo).suffix == ".parquet":
+        return pd.read_parquet(archivo)
+    return pd.read_csv(archivo, comment='#', dtype='float64')
+
 def cargar_y_graficar(archivo):
-    """Carga un CSV y lo grafica - súper simple"""
+    """Carga un archivo y lo grafica - súper simple"""
     try:
         # Cargar datos
-        datos = pd.read_csv(archivo, comment='#')
+        datos = _leer(archivo)
         print(f"✅ Cargado: {archivo}")
         print(f"   Filas: {len(datos)}, Columnas: {list(datos.columns)}")
         
         # Graficar
-        plt.figure(figsize=(12, 4))
+        fig = plt.figure(figsize=(12, 4))
         
         # Densidad
         plt.subplot(1, 3, 1)
-        plt.plot(datos["r"], datos["rho"], 'b-', linewidth=2)
+        plt.plot(*_serie(datos, "r", "rho"), 'b-', linewidth=2)
         plt.title("Densidad")
         plt.xlabel("r")
         plt.ylabel("ρ")
@@ -29,7 +90,7 @@ def cargar_y_graficar(archivo):
         
         # Presión
         plt.subplot(1, 3, 2)
-        plt.plot(datos["r"], datos["p"], 'r-', linewidth=2)
+        plt.plot(*_serie(datos, "r", "p"), 'r-', linewidth=2)
         plt.title("Presión")
         plt.xlabel("r")
         plt.ylabel("p")
@@ -37,7 +98,7 @@ def cargar_y_graficar(archivo):
         
         # Ecuación de estado
         plt.subplot(1, 3, 3)
-        plt.plot(datos["rho"], datos["p"], 'g-', linewidth=2)
+        plt.plot(*_serie(datos, "rho", "p"), 'g-', linewidth=2)
         plt.title("p vs ρ")
         plt.xlabel("ρ")
         plt.ylabel("p")
@@ -45,7 +106,7 @@ def cargar_y_graficar(archivo):
         
         plt.suptitle(f"Datos de {Path(archivo).name}")
         plt.tight_layout()
-        plt.show()
+        _mostrar(fig, Path(archivo).stem)
         
         return datos
         
@@ -53,25 +114,39 @@ def cargar_y_graficar(archivo):
         print(f"❌ Error: {e}")
         return None
 
-def buscar_archivos():
-    """Busca archivos CSV de Tolman"""
-    # Buscar en varias ubicaciones
-    ubicaciones = [
-        ".",
-        "../data/tolman/",
-        "data/tolman/",
-        "../",
-    ]
-    
-    archivos = []
-    for ubicacion in ubicaciones:
-        path = Path(ubicacion)
-        if path.exists():
-            archivos.extend(list(path.glob("*.csv")))
-            archivos.extend(list(path.glob("tolman*.csv")))
-    
-    # Quitar duplicados
-    archivos = list(set(archivos))
+# Resultado de la última búsqueda; los directorios no cambian durante la sesión
+_archivos_encontrados = []
+
+def buscar_archivos(reescanear=False):
+    """Busca archivos de Tolman, Parquet o CSV (solo la primera vez o al reescanear)"""
+    if reescanear:
+        _archivos_encontrados.clear()
+    
+    if not _archivos_encontrados:
+        # Buscar en varias ubicaciones
+        ubicaciones = [
+            ".",
+            "../data/tolman/",
+            "data/tolman/",
+            "../",
+        ]
+        
+        # Quitar duplicados por ruta absoluta, conservando el orden
+        vistos = set()
+        for ubicacion in ubicaciones:
+            path = Path(ubicacion)
+            if path.exists():
+                # Si un caso está en Parquet y en CSV, se queda el Parquet
+                por_caso = {}
+                for archivo in [*path.glob("*.parquet"), *path.glob("*.csv")]:
+                    por_caso.setdefault(archivo.stem, archivo)
+                for archivo in sorted(por_caso.values()):
+                    ruta = archivo.resolve()
+                    if ruta not in vistos:
+                        vistos.add(ruta)
+                        _archivos_encontrados.append(archivo)
+    
+    archivos = list(_archivos_encontrados)
     
     if archivos:
         print(f"📁 Encontrados {len(archivos)} archivos:")
@@ -79,60 +154,68 @@ def buscar_archivos():
             print(f"  {i}: {archivo.name}")
         return archivos
     else:
-        print("❌ No se encontraron archivos CSV")
+        print("❌ No se encontraron archivos de datos")
         return []
 
+def _curvas(ax, datos_list, x, y):
+    """Dibuja una curva por archivo como un solo LineCollection"""
+    ciclo = plt.rcParams['axes.prop_cycle'].by_key()['color']
+    colores = [ciclo[i % len(ciclo)] for i in range(len(datos_list))]
+    segmentos = [np.column_stack(_serie(datos, x, y)) for _, datos in datos_list]
+    
+    ax.add_collection(LineCollection(segmentos, colors=colores, linewidths=2))
+    ax.autoscale_view()
+    # Los grupos van por ruta completa; la leyenda solo muestra el nombre
+    ax.legend(handles=[
+        Line2D([], [], color=color, linewidth=2, label=Path(ruta).name)
+        for color, (ruta, _) in zip(colores, datos_list)
+    ])
+
 def comparar_archivos(archivos):
     """Compara varios archivos en una gráfica"""
-    plt.figure(figsize=(15, 4))
+    fig = plt.figure(figsize=(15, 4))
     
-    datos_list = []
+    frames = []
     
-    # Cargar todos los archivos
+    # Cargar todos los archivos, etiquetando cada fila con su ruta
+    # (dos archivos con el mismo nombre en carpetas distintas no se mezclan)
     for archivo in archivos:
         try:
-            datos = pd.read_csv(archivo, comment='#')
-            datos_list.append((archivo.name, datos))
+            frames.append(_leer(archivo).assign(source=str(archivo)))
         except:
             continue
     
-    if not datos_list:
+    if not frames:
         print("❌ No se pudieron cargar archivos")
         return
     
+    # Un solo DataFrame; cada gráfica recorre los grupos por archivo
+    datos_list = list(pd.concat(frames, ignore_index=True).groupby('source', sort=False))
+    
     # Densidades
-    plt.subplot(1, 3, 1)
-    for nombre, datos in datos_list:
-        plt.plot(datos["r"], datos["rho"], linewidth=2, label=nombre)
+    _curvas(plt.subplot(1, 3, 1), datos_list, "r", "rho")
     plt.title("Densidades")
     plt.xlabel("r")
     plt.ylabel("ρ")
-    plt.legend()
     plt.grid(True)
     
     # Presiones
-    plt.subplot(1, 3, 2)
-    for nombre, datos in datos_list:
-        plt.plot(datos["r"], datos["p"], linewidth=2, label=nombre)
+    _curvas(plt.subplot(1, 3, 2), datos_list, "r", "p")
     plt.title("Presiones")
     plt.xlabel("r")
     plt.ylabel("p")
-    plt.legend()
     plt.grid(True)
     
     # Ecuaciones de estado
-    plt.subplot(1, 3, 3)
-    for nombre, datos in datos_list:
-        plt.plot(datos["rho"], datos["p"], linewidth=2, label=nombre)
+    _curvas(plt.subplot(1, 3, 3), datos_list, "rho", "p")
     plt.title("p vs ρ")
     plt.xlabel("ρ")
     plt.ylabel("p")
-    plt.legend()
     plt.grid(True)
     
     plt.suptitle("Comparación de archivos")
     plt.tight_layout()
-    plt.show()
+    _mostrar(fig, "comparacion")
 
 def verificar_fisica(datos):
     """Verifica si los datos son físicamente válidos"""
@@ -141,10 +224,11 @@ def verificar_fisica(datos):
     
     print("\n🔍 Verificación:")
     
-    # Verificaciones básicas
-    rho_ok = (datos["rho"] > 0).all()
-    p_ok = (datos["p"] >= 0).all()
-    energia_ok = (datos["rho"] >= datos["p"]).all()
+    # Verificaciones básicas, reducidas juntas sobre los arreglos de NumPy
+    rho = datos["rho"].to_numpy()
+    p = datos["p"].to_numpy()
+    checks = np.stack([rho > 0, p >= 0, rho >= p])
+    rho_ok, p_ok, energia_ok = checks.all(axis=1).tolist()
     
     print(f"  {'✅' if rho_ok else '❌'} Densidad positiva")
     print(f"  {'✅' if p_ok else '❌'} Presión no negativa")
@@ -164,6 +248,7 @@ def menu():
         print("1. Ver archivos disponibles")
         print("2. Cargar y graficar UN archivo")
         print("3. Comparar TODOS los archivos")
+        print("4. Volver a buscar archivos")
         print("0. Salir")
         print("="*40)
         
@@ -195,12 +280,28 @@ def menu():
             if archivos:
                 comparar_archivos(archivos)
             
+        elif opcion == "4":
+            buscar_archivos(reescanear=True)
+            
         else:
             print("❌ Opción no válida")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Explorador de archivos Tolman IV")
+    parser.add_argument("--no-show", action="store_true",
+                        help="guardar las figuras como PNG en vez de abrir ventanas")
+    parser.add_argument("--figuras", default="figuras",
+                        help="carpeta para los PNG con --no-show (default: figuras)")
+    args = parser.parse_args()
+    
+    if args.no_show:
+        # Sin ventanas: Agg evita elegir un backend gráfico (y colgarse sin pantalla)
+        plt.switch_backend('Agg')
+        plt.ioff()
+        DIRECTORIO_FIGURAS = args.figuras
+    
     print("📊 Explorador súper simple de archivos Tolman IV")
-    print("Solo necesitas archivos CSV - no depende de nada más")
+    print("Solo necesitas archivos Parquet o CSV - no depende de nada más")
     print()
     
     # Ver si hay archivos
@@ -220,5 +321,5 @@ if __name__ == "__main__":
         else:
             menu()
     else:
-        print("❌ No se encontraron archivos CSV")
-        print("💡 Asegúrate de tener archivos .csv en la carpeta actual o data/tolman/")
\ No newline at end of file
+        print("❌ No se encontraron archivos de datos")
+        print("💡 Asegúrate de tener archivos .parquet o .csv en la carpeta actual o data/tolman/")
\ No newline at end of file
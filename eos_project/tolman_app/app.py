@@ -1,6 +1,9 @@
+import io
 import streamlit as st
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from pathlib import Path
 
 # Configuración de la página
@@ -10,19 +13,38 @@ st.set_page_config(
     layout="wide"
 )
 
+# Columnas que usa la app; el resto del archivo no se lee
+COLUMNS = ['r', 'rho', 'p']
+
+@st.cache_data(ttl=60)
 def load_csv_files():
-    """Encuentra todos los archivos CSV de Tolman"""
+    """Encuentra todos los archivos de Tolman (Parquet o CSV)"""
     data_path = Path("../data/tolman")
-    csv_files = list(data_path.glob("*.csv"))
-    return {file.name: file for file in csv_files}
+    # Ruta relativa: desde otro directorio la carpeta puede no existir
+    if not data_path.is_dir():
+        return {}
+    
+    # Una sola lectura del directorio, filtrando por extensión; si un caso
+    # está en Parquet y en CSV, se lista solo el Parquet
+    por_caso = {}
+    for file in sorted(data_path.iterdir(), key=lambda f: f.suffix != '.parquet'):
+        if file.suffix in ('.parquet', '.csv'):
+            por_caso.setdefault(file.stem, file)
+    return {file.name: file for file in sorted(por_caso.values())}
 
-def load_data(file_path):
-    """Carga un archivo CSV"""
-    return pd.read_csv(file_path)
+@st.cache_data(show_spinner=False)
+def load_data(file_path, mtime):
+    """Carga un archivo de datos (en caché por ruta y fecha de modificación)"""
+    if file_path.endswith('.parquet'):
+        return pd.read_parquet(file_path, columns=COLUMNS)
+    return pd.read_csv(file_path, usecols=COLUMNS, dtype='float64', engine='c')
 
 def create_plots(data, filename):
     """Crea las 3 gráficas principales"""
-    fig, axes = plt.subplots(1, 3, figsize=(15, 5))
+    # Figure con lienzo Agg propio: no pasa por el registro global de pyplot
+    fig = Figure(figsize=(15, 5))
+    FigureCanvasAgg(fig)
+    axes = fig.subplots(1, 3)
     
     # Densidad vs radio
     axes[0].plot(data['r'], data['rho'], 'b-', linewidth=2)
@@ -45,9 +67,18 @@ def create_plots(data, filename):
     axes[2].set_title('Ecuación de Estado')
     axes[2].grid(True, alpha=0.3)
     
-    plt.tight_layout()
+    fig.tight_layout()
     return fig
 
+@st.cache_data(show_spinner=False, max_entries=32)
+def create_plots_png(file_path, mtime):
+    """Gráficas como PNG (en caché por ruta y fecha de modificación)"""
+    # Cada llamada usa su propia Figure; entre sesiones solo se comparten bytes
+    fig = create_plots(load_data(file_path, mtime), Path(file_path).name)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=200)
+    return buffer.getvalue()
+
 # INTERFAZ PRINCIPAL
 def main():
     st.title("🌟 Tolman IV Explorer")
@@ -57,13 +88,13 @@ def main():
     csv_files = load_csv_files()
     
     if not csv_files:
-        st.error("❌ No se encontraron archivos CSV en ../data/tolman/")
+        st.error("❌ No se encontraron archivos de datos en ../data/tolman/")
         return
     
     # Sidebar para selección
     st.sidebar.header("📁 Seleccionar Archivo")
     selected_file = st.sidebar.selectbox(
-        "Archivo CSV:",
+        "Archivo de datos:",
         options=list(csv_files.keys()),
         index=0
     )
@@ -71,7 +102,9 @@ def main():
     # Cargar y mostrar datos
     if selected_file:
         try:
-            data = load_data(csv_files[selected_file])
+            file_path = csv_files[selected_file]
+            mtime = file_path.stat().st_mtime
+            data = load_data(str(file_path), mtime)
             
             # Información del archivo
             st.header(f"📊 {selected_file}")
@@ -86,23 +119,24 @@ def main():
             
             # Gráficas
             st.subheader("📈 Gráficas")
-            fig = create_plots(data, selected_file)
-            st.pyplot(fig)
+            st.image(create_plots_png(str(file_path), mtime), width="stretch")
             
             # Verificación física básica
             st.subheader("🔍 Verificación Física")
             col1, col2, col3 = st.columns(3)
             
+            # Las tres condiciones sobre los arreglos de NumPy, reducidas juntas
+            rho = data['rho'].to_numpy()
+            p = data['p'].to_numpy()
+            rho_ok, p_ok, energy_ok = np.stack([rho > 0, p >= 0, rho >= p]).all(axis=1).tolist()
+            
             with col1:
-                rho_ok = (data['rho'] > 0).all()
                 st.metric("Densidad positiva", "✅" if rho_ok else "❌")
             
             with col2:
-                p_ok = (data['p'] >= 0).all()
                 st.metric("Presión no negativa", "✅" if p_ok else "❌")
             
             with col3:
-                energy_ok = (data['rho'] >= data['p']).all()
                 st.metric("Condición energía", "✅" if energy_ok else "❌")
             
         except Exception as e: